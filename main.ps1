@@ -2,10 +2,13 @@
 .SYNOPSIS
     Video processing script. Run as a script: .\main.ps1 (do not dot-source).
 #>
+#Requires -Version 7.2
 param(
     [switch]$debugProgram,
     [switch]$skipAudio,
     [switch]$skipVideo,
+    [switch]$batch,
+    [int]$encoderThreads = 0,
     [string]$Title,
     [string]$Artist
 )
@@ -28,21 +31,105 @@ $workDir        = "C:\Users\LEGION\Desktop\إخراج"
 $destOrigVideo  = "D:\01 - الفيديو"
 $destCompVideo  = "D:\02 - مضغوط"
 $destAudio      = "D:\03 - صوت"
+$metaTitle      = "الشيخ محمد فواز النمر"  # title tag written into every audio/video output
+
+# Characters that can't appear in file names (looked up once for the whole run).
+$invalidFileNameChars = [System.IO.Path]::GetInvalidFileNameChars()
+
+# Regex patterns used by the helpers below, compiled once for the whole run.
+$reWhitespace  = [regex]::new('\s+', 'Compiled')
+# Leading date: either separated (2026/2/4, 2026\02\04, 2026-02-04 -> groups 1-3 + rest in 6)
+# or compact/partly separated (20260204, 2026-0204 -> groups 1, 4, 5; left as is).
+$reLeadingDate = [regex]::new('^\s*(\d{4})(?:[-/\s\\]+(\d{1,2})[-/\s\\]+(\d{1,2})(?=\s|$)|[-/\s\\]?(\d{2})[-/\s\\]?(\d{2}))(.*)$', 'Compiled')
+
+# Create an output directory if needed (no-op if it exists) and mark it "not content indexed".
+# New files inherit the attribute, so Windows Search doesn't read multi-GB outputs while they are being written.
+function Initialize-OutputDirectory($dirPath) {
+    $dir = [System.IO.Directory]::CreateDirectory($dirPath)
+    $notIndexed = [System.IO.FileAttributes]::NotContentIndexed
+    if (-not ($dir.Attributes -band $notIndexed)) {
+        try { $dir.Attributes = $dir.Attributes -bor $notIndexed } catch { }
+    }
+}
 
-# Ensure base directories exist
-if (-not (Test-Path $workDir)) { New-Item -ItemType Directory -Path $workDir -Force | Out-Null }
-if (-not (Test-Path $destOrigVideo)) { New-Item -ItemType Directory -Path $destOrigVideo -Force | Out-Null }
-if (-not (Test-Path $destCompVideo)) { New-Item -ItemType Directory -Path $destCompVideo -Force | Out-Null }
-if (-not (Test-Path $destAudio)) { New-Item -ItemType Directory -Path $destAudio -Force | Out-Null }
+# Ensure base directories exist.
+# File-system checks below use System.IO directly: one OS call each, and paths are literal
+# (Test-Path/Get-Item would treat [ ] in a title as wildcards).
+foreach ($dir in @($workDir, $destOrigVideo, $destCompVideo, $destAudio)) {
+    Initialize-OutputDirectory $dir
+}
 
 # --- FFmpeg Command Builders ---
 
-function Get-AudioEncodeArgs($inputPath, $outputPath, $metaTitle, $albumArtist) {
-    # -map 0:a:0 = use only first audio stream (video is never decoded); -application voip = tuned for speech/lectures
-    return "-y -hide_banner -i `"$inputPath`" -map 0:a:0 -vn -c:a libopus -application voip -b:a 18k -map_metadata -1 -metadata title=`"$metaTitle`" -metadata album_artist=`"$albumArtist`" -metadata:s:a:0 title=`"$metaTitle`" `"$outputPath`""
+# Whether hevc_nvenc actually works here (build has it AND an NVIDIA GPU/driver is present).
+# Probed once with a tiny test encode; the result is cached for the rest of the run.
+$script:hasNvenc = $null
+function Test-HasNvenc {
+    if ($null -eq $script:hasNvenc) {
+        try {
+            & ffmpeg -hide_banner -loglevel error -f lavfi -i "color=c=black:s=256x256:d=0.1" -frames:v 1 -c:v hevc_nvenc -f null - 2>$null | Out-Null
+            $script:hasNvenc = ($LASTEXITCODE -eq 0)
+        } catch {
+            $script:hasNvenc = $false
+        }
+    }
+    return $script:hasNvenc
 }
-function Get-H265480EncodeArgs($inputPath, $outputPath, $metaTitle) {
-    return "-y -hide_banner -hwaccel cuda -hwaccel_output_format cuda -i `"$inputPath`" -fps_mode passthrough -vf `"scale_cuda=-2:480:interp_algo=lanczos`" -spatial_aq 1 -temporal_aq 1 -rc-lookahead 32 -map_metadata -1 -c:v hevc_nvenc -pixel_format yuv420p -rc constqp -qp 23 -preset p7 -tag:v hvc1 -c:a aac -b:a 128k -ar 48000 -ac 2 -map_chapters 0 -metadata:s:a:0 title=`"$metaTitle`" -movflags +faststart `"$outputPath`""
+
+# Whether this ffmpeg build has the scale_cuda filter (needed to keep the NVENC pipeline on the GPU). Cached like Test-HasNvenc.
+$script:hasCudaScale = $null
+function Test-HasCudaScale {
+    if ($null -eq $script:hasCudaScale) {
+        try {
+            $filters = & ffmpeg -hide_banner -filters 2>$null
+            $script:hasCudaScale = [bool]($filters | Select-String -SimpleMatch ' scale_cuda ' -Quiet)
+        } catch {
+            $script:hasCudaScale = $false
+        }
+    }
+    return $script:hasCudaScale
+}
+
+# Fixed parts of the ffmpeg command lines (only paths, titles and the GPU/CPU pieces vary per call).
+# Output goes to per-job log files; skip the per-frame stats line and keep only warnings/errors.
+# Progress comes from -progress (key=value blocks in a side file), polled once a second in Step 5c.
+$ffmpegLogOptions     = "-nostats -loglevel warning"
+# -map 0:a:0 = use only first audio stream (video is never decoded); -application voip = tuned for speech/lectures
+$audioEncodeOptions   = "-map 0:a:0 -vn -c:a libopus -application voip -b:a 18k -map_metadata -1"
+$h265NvencOptions     = "-spatial_aq 1 -temporal_aq 1 -rc-lookahead 32 -map_metadata -1 -c:v hevc_nvenc -pixel_format yuv420p -rc constqp -qp 23 -preset p7"
+$h265X265Options      = "-map_metadata -1 -c:v libx265 -pixel_format yuv420p -preset veryfast -crf 24"
+$h265480OutputOptions = "-tag:v hvc1 -c:a aac -b:a 128k -ar 48000 -ac 2 -map_chapters 0"
+
+function Get-FfmpegProgressArgs($progressPath) {
+    if (-not $progressPath) { return "" }
+    return "-progress `"$progressPath`""
+}
+function Get-AudioEncodeArgs($inputPath, $outputPath, $metaTitle, $albumArtist, $progressPath) {
+    return "-y -hide_banner $ffmpegLogOptions $(Get-FfmpegProgressArgs $progressPath) -i `"$inputPath`" $audioEncodeOptions -metadata title=`"$metaTitle`" -metadata album_artist=`"$albumArtist`" -metadata:s:a:0 title=`"$metaTitle`" `"$outputPath`""
+}
+function Get-H265480EncodeArgs($inputPath, $outputPath, $metaTitle, $progressPath) {
+    if (-not (Test-HasNvenc)) {
+        # CPU fallback for machines without NVENC (same 480p H.265 target, libx265 veryfast).
+        $decodeArgs = ""
+        $scaleFilter = "scale=-2:480:flags=lanczos"
+        # Size x265's thread pool explicitly: -encoderThreads caps it on a busy machine, otherwise use all
+        # cores but one (left for the concurrent libopus job). Frame threads beyond ~6 only add latency.
+        $pools = if ($encoderThreads -gt 0) { $encoderThreads } else { [Math]::Max(1, [Environment]::ProcessorCount - 1) }
+        $frameThreads = [Math]::Min(6, [Math]::Max(1, [Math]::Floor($pools / 2)))
+        $encodeOptions = "$h265X265Options -x265-params pools=${pools}:frame-threads=$frameThreads"
+    } elseif (Test-HasCudaScale) {
+        # Decode and scale on the GPU so frames stay in VRAM from decoder to NVENC.
+        # -hwaccel must precede -i, and is pinned to cuda rather than "auto": auto may pick another
+        # decoder (or none) and silently bring back a VRAM<->RAM copy per frame.
+        $decodeArgs = "-hwaccel cuda -hwaccel_output_format cuda"
+        $scaleFilter = "scale_cuda=-2:480:interp_algo=lanczos"
+        $encodeOptions = $h265NvencOptions
+    } else {
+        $decodeArgs = ""
+        $scaleFilter = "scale=-2:480:flags=lanczos"
+        $encodeOptions = $h265NvencOptions
+    }
+    return "-y -hide_banner $ffmpegLogOptions $(Get-FfmpegProgressArgs $progressPath) $decodeArgs -i `"$inputPath`" -fps_mode passthrough -vf `"$scaleFilter`" $encodeOptions $h265480OutputOptions -metadata:s:a:0 title=`"$metaTitle`" -movflags +faststart `"$outputPath`""
 }
 
 # --- Helper Functions ---
@@ -61,19 +148,28 @@ function Convert-ToRtl {
     return "$RLE$Text$PDF"
 }
 
+# Load the WinForms/Drawing assemblies on first use; later dialogs (batch mode) skip the Add-Type calls.
+$script:winFormsLoaded = $false
+function Initialize-WinForms {
+    if ($script:winFormsLoaded) { return }
+    Add-Type -AssemblyName System.Windows.Forms
+    Add-Type -AssemblyName System.Drawing
+    $script:winFormsLoaded = $true
+}
+
 function Show-FileSelector {
     param(
         [string]$InitialDirectory
     )
 
-    # Load the required .NET assembly
-    Add-Type -AssemblyName System.Windows.Forms
+    # Load the required .NET assemblies
+    Initialize-WinForms
 
     $openFileDialog = New-Object System.Windows.Forms.OpenFileDialog
     $openFileDialog.Title = "Select a Video File"
     $openFileDialog.Filter = "Video Files|*.mp4;*.mkv;*.mov;*.avi;*.flv;*.obs|All Files|*.*"
 
-    if ($InitialDirectory -and (Test-Path $InitialDirectory)) {
+    if ($InitialDirectory -and [System.IO.Directory]::Exists($InitialDirectory)) {
         $openFileDialog.InitialDirectory = $InitialDirectory
     }
     else {
@@ -84,47 +180,58 @@ function Show-FileSelector {
     $openFileDialog.Multiselect = $false
 
     # Show the dialog. If user clicks OK, return the path.
-    if ($openFileDialog.ShowDialog() -eq [System.Windows.Forms.DialogResult]::OK) {
-        return $openFileDialog.FileName
+    try {
+        if ($openFileDialog.ShowDialog() -eq [System.Windows.Forms.DialogResult]::OK) {
+            return $openFileDialog.FileName
+        }
+        return $null
+    }
+    finally {
+        $openFileDialog.Dispose()
     }
-
-    return $null
 }
 
 # Sanitize a string for safe use in file/directory names (remove path-breaking characters).
 function Get-SafeFileName {
     param([string]$Text)
     if ([string]::IsNullOrEmpty($Text)) { return "" }
-    $invalid = [System.IO.Path]::GetInvalidFileNameChars()
-    $sanitized = $Text
-    foreach ($c in $invalid) {
-        $sanitized = $sanitized.Replace([string]$c, " ")
-    }
-    return ($sanitized -replace '\s+', ' ').Trim()
+    # Split on any invalid character and re-join with spaces: one native scan, same result as replacing each.
+    $sanitized = [string]::Join(" ", $Text.Split($invalidFileNameChars))
+    return $reWhitespace.Replace($sanitized, " ").Trim()
 }
 
 # If title starts with a date (e.g. 2026/02/04, 2026\02\04, 2026-02-04), normalize to YYYYMMDD (no slashes).
+# Returns [PSCustomObject] with Text (normalized title) and HasLeadingDate (also true for an already compact 20260204),
+# so callers know whether to add their own date prefix without matching the title again.
 function Normalize-LeadingDateInTitle {
     param([string]$Text)
-    if ([string]::IsNullOrEmpty($Text)) { return "" }
-    if ($Text -match '^\s*(\d{4})[-/\s\\]+(\d{1,2})[-/\s\\]+(\d{1,2})(\s.*|$)') {
-        $y = $Matches[1]
-        $m = $Matches[2].PadLeft(2, '0')
-        $d = $Matches[3].PadLeft(2, '0')
-        $rest = $Matches[4]
-        return "$y$m$d$rest"
-    }
-    return $Text
+    if ([string]::IsNullOrEmpty($Text)) { return [PSCustomObject]@{ Text = ""; HasLeadingDate = $false } }
+    $match = $reLeadingDate.Match($Text)
+    if (-not $match.Success) { return [PSCustomObject]@{ Text = $Text; HasLeadingDate = $false } }
+    if (-not $match.Groups[2].Success) { return [PSCustomObject]@{ Text = $Text; HasLeadingDate = $true } }
+
+    $y = $match.Groups[1].Value
+    $m = $match.Groups[2].Value.PadLeft(2, '0')
+    $d = $match.Groups[3].Value.PadLeft(2, '0')
+    $rest = $match.Groups[6].Value
+    return [PSCustomObject]@{ Text = "$y$m$d$rest"; HasLeadingDate = $true }
 }
 
-# Escape text for safe use in HTML (e.g. value="" attribute).
-function Escape-HtmlForDialog {
-    param([string]$Text)
-    if ([string]::IsNullOrEmpty($Text)) { return "" }
-    return $Text -replace '&', '&amp;' -replace '<', '&lt;' -replace '>', '&gt;' -replace '"', '&quot;'
+# Base name shared by all outputs of a recording: the sanitized title, prefixed with the date unless the
+# title already starts with one (e.g. 20260204, 2026-02-04, 2026\02\04).
+function Get-OutputBaseName {
+    param(
+        [string]$CleanTitle,
+        [bool]$TitleStartsWithDate,
+        [datetime]$Date
+    )
+    # Sanitize title so backslashes etc. don't break paths.
+    $safeTitle = Get-SafeFileName -Text $CleanTitle
+    if ($TitleStartsWithDate) { return $safeTitle }
+    return $Date.ToString("yyyyMMdd ") + $safeTitle
 }
 
-# HTML dialog for title and artist (RTL, editable). Returns [PSCustomObject] with CleanTitle, AlbumArtist, SkipAudio, SkipVideo on OK; $null on Cancel.
+# Title/artist dialog (RTL, editable) built from plain WinForms controls. Returns [PSCustomObject] with CleanTitle, AlbumArtist, SkipAudio, SkipVideo on OK; $null on Cancel.
 function Show-TitleConfirmationDialog {
     param(
         [string]$TitleText,
@@ -133,177 +240,507 @@ function Show-TitleConfirmationDialog {
         [switch]$InitialSkipVideo
     )
 
-    Add-Type -AssemblyName System.Windows.Forms
-    Add-Type -AssemblyName System.Drawing
-
-    $skipAudioChecked = if ($InitialSkipAudio) { " checked" } else { "" }
-    $skipVideoChecked = if ($InitialSkipVideo) { " checked" } else { "" }
+    Initialize-WinForms
 
-    $callbackSource = @'
-using System;
-using System.Runtime.InteropServices;
-[ComVisible(true)]
-public class DialogResultCallbackV2 {
-    public static bool? Result;
-    public static string TitleResult;
-    public static string ArtistResult;
-    public static bool SkipAudioResult;
-    public static bool SkipVideoResult;
-    public void Confirm(bool ok, object titleObj, object artistObj, bool skipAudio, bool skipVideo) {
-        Result = ok;
-        TitleResult = titleObj != null ? titleObj.ToString() : "";
-        ArtistResult = artistObj != null ? artistObj.ToString() : "";
-        SkipAudioResult = skipAudio;
-        SkipVideoResult = skipVideo;
-    }
-}
-'@
-    try { Add-Type -TypeDefinition $callbackSource } catch { }
-    [DialogResultCallbackV2]::Result = $null
-    [DialogResultCallbackV2]::TitleResult = ""
-    [DialogResultCallbackV2]::ArtistResult = ""
-    [DialogResultCallbackV2]::SkipAudioResult = $false
-    [DialogResultCallbackV2]::SkipVideoResult = $false
-
-    $titleEscaped = Escape-HtmlForDialog -Text $TitleText
-    $artistEscaped = Escape-HtmlForDialog -Text $ArtistText
-
-    $html = @"
-<!DOCTYPE html>
-<html dir="rtl" lang="ar">
-<head>
-<meta charset="UTF-8">
-<style>
-  body { font-family: 'Segoe UI', Tahoma, sans-serif; font-size: 14px; padding: 24px; margin: 0; }
-  .row { margin-bottom: 16px; }
-  label { display: inline-block; width: 90px; font-weight: bold; }
-  input[type="text"] { width: 280px; padding: 8px 10px; border: 1px solid #ccc; border-radius: 4px; font-size: 14px; }
-  input[type="checkbox"] { margin-left: 8px; vertical-align: middle; }
-  .buttons { margin-top: 28px; padding-top: 16px; }
-  .buttons button { padding: 12px 28px; margin-left: 14px; cursor: pointer; font-size: 14px; border-radius: 6px; border: 1px solid #ccc; }
-  .buttons button:first-of-type { margin-left: 0; background: #0078d4; color: #fff; border-color: #0078d4; }
-  .buttons button:hover { opacity: 0.9; }
-</style>
-</head>
-<body>
-  <div class="row"><label>العنوان:</label><input type="text" id="titleInput" value="$titleEscaped" dir="rtl"></div>
-  <div class="row"><label>الفنان:</label><input type="text" id="artistInput" value="$artistEscaped" dir="rtl"></div>
-  <div class="row"><label>تخطي الصوت:</label><input type="checkbox" id="skipAudio"$skipAudioChecked></div>
-  <div class="row"><label>تخطي الفيديو:</label><input type="checkbox" id="skipVideo"$skipVideoChecked></div>
-  <div class="buttons">
-    <button type="button" onclick="window.external.Confirm(true, document.getElementById('titleInput').value, document.getElementById('artistInput').value, document.getElementById('skipAudio').checked, document.getElementById('skipVideo').checked)">موافق</button>
-    <button type="button" onclick="window.external.Confirm(false, '', '', false, false)">إلغاء</button>
-  </div>
-<script>
-window.initSelectOnFirstClick = function() {
-  var firstTime = { titleInput: true, artistInput: true };
-  function doSelect(el, id) {
-    if (firstTime[id]) {
-      firstTime[id] = false;
-      el.select();
-    }
-  }
-  function add(id) {
-    var el = document.getElementById(id);
-    if (!el) return;
-    el.onfocus = function() { doSelect(el, id); };
-    el.onmouseup = function() { doSelect(el, id); };
-  }
-  add('titleInput');
-  add('artistInput');
-};
-</script>
-</body>
-</html>
-"@
-
-    $tempFile = [System.IO.Path]::Combine([System.IO.Path]::GetTempPath(), "title_confirm_" + [Guid]::NewGuid().ToString("N") + ".html")
-    [System.IO.File]::WriteAllText($tempFile, $html, [System.Text.Encoding]::UTF8)
+    $form = New-Object System.Windows.Forms.Form
     try {
-        $form = New-Object System.Windows.Forms.Form
         $form.Text = "Confirm Title"
-        $form.Size = New-Object System.Drawing.Size(560, 320)
+        $form.ClientSize = New-Object System.Drawing.Size(460, 230)
         $form.StartPosition = "CenterScreen"
         $form.FormBorderStyle = "FixedDialog"
-
-        $browser = New-Object System.Windows.Forms.WebBrowser
-        $browser.Dock = [System.Windows.Forms.DockStyle]::Fill
-        $browser.ScriptErrorsSuppressed = $true
-        $browser.IsWebBrowserContextMenuEnabled = $false
-        $form.Controls.Add($browser)
-
-        $callback = New-Object DialogResultCallbackV2
-        $browser.ObjectForScripting = $callback
-
-        $timer = New-Object System.Windows.Forms.Timer
-        $timer.Interval = 150
-        $timer.Add_Tick({
-                if ([DialogResultCallbackV2]::Result -ne $null) {
-                    $timer.Stop()
-                    $form.Close()
-                }
-            })
-        $form.Add_Shown({ $timer.Start() })
-        $form.Add_FormClosed({ $timer.Stop() })
-
-        $browser.Add_DocumentCompleted({
-            if ($browser.Document -and $browser.ReadyState -eq [System.Windows.Forms.WebBrowserReadyState]::Complete) {
-                try {
-                    $browser.Document.InvokeScript("initSelectOnFirstClick")
-                } catch { }
-            }
-        })
-
-        $fileUri = [System.Uri]::new("file:///" + $tempFile.Replace("\", "/").Replace(" ", "%20"))
-        $browser.Navigate($fileUri.AbsoluteUri)
-        $null = $form.ShowDialog()
-
-        if ([DialogResultCallbackV2]::Result -eq $true) {
-            $t = [DialogResultCallbackV2]::TitleResult; if (-not $t) { $t = "" }
-            $a = [DialogResultCallbackV2]::ArtistResult; if (-not $a) { $a = "" }
-            return [PSCustomObject]@{
-                CleanTitle  = $t.Trim()
-                AlbumArtist = $a.Trim()
-                SkipAudio   = [DialogResultCallbackV2]::SkipAudioResult
-                SkipVideo   = [DialogResultCallbackV2]::SkipVideoResult
-            }
+        $form.MaximizeBox = $false
+        $form.MinimizeBox = $false
+        $form.Font = New-Object System.Drawing.Font("Segoe UI", 10)
+        $form.RightToLeft = [System.Windows.Forms.RightToLeft]::Yes
+        $form.RightToLeftLayout = $true  # mirror the coordinates below, so labels sit on the right
+
+        $titleLabel = New-Object System.Windows.Forms.Label
+        $titleLabel.Text = "العنوان:"
+        $titleLabel.Location = New-Object System.Drawing.Point(20, 23)
+        $titleLabel.AutoSize = $true
+        $titleBox = New-Object System.Windows.Forms.TextBox
+        $titleBox.Text = $TitleText
+        $titleBox.Location = New-Object System.Drawing.Point(130, 20)
+        $titleBox.Width = 310
+
+        $artistLabel = New-Object System.Windows.Forms.Label
+        $artistLabel.Text = "الفنان:"
+        $artistLabel.Location = New-Object System.Drawing.Point(20, 63)
+        $artistLabel.AutoSize = $true
+        $artistBox = New-Object System.Windows.Forms.TextBox
+        $artistBox.Text = $ArtistText
+        $artistBox.Location = New-Object System.Drawing.Point(130, 60)
+        $artistBox.Width = 310
+
+        $skipAudioBox = New-Object System.Windows.Forms.CheckBox
+        $skipAudioBox.Text = "تخطي الصوت"
+        $skipAudioBox.Checked = [bool]$InitialSkipAudio
+        $skipAudioBox.Location = New-Object System.Drawing.Point(20, 100)
+        $skipAudioBox.AutoSize = $true
+
+        $skipVideoBox = New-Object System.Windows.Forms.CheckBox
+        $skipVideoBox.Text = "تخطي الفيديو"
+        $skipVideoBox.Checked = [bool]$InitialSkipVideo
+        $skipVideoBox.Location = New-Object System.Drawing.Point(20, 130)
+        $skipVideoBox.AutoSize = $true
+
+        # Enter/Esc map to OK/Cancel through AcceptButton/CancelButton.
+        $okButton = New-Object System.Windows.Forms.Button
+        $okButton.Text = "موافق"
+        $okButton.DialogResult = [System.Windows.Forms.DialogResult]::OK
+        $okButton.Location = New-Object System.Drawing.Point(20, 175)
+        $okButton.Size = New-Object System.Drawing.Size(100, 34)
+        $cancelButton = New-Object System.Windows.Forms.Button
+        $cancelButton.Text = "إلغاء"
+        $cancelButton.DialogResult = [System.Windows.Forms.DialogResult]::Cancel
+        $cancelButton.Location = New-Object System.Drawing.Point(130, 175)
+        $cancelButton.Size = New-Object System.Drawing.Size(100, 34)
+        $form.AcceptButton = $okButton
+        $form.CancelButton = $cancelButton
+
+        $form.Controls.AddRange(@($titleLabel, $titleBox, $artistLabel, $artistBox, $skipAudioBox, $skipVideoBox, $okButton, $cancelButton))
+        # Select the pre-filled title so typing replaces it.
+        $form.Add_Shown({ $titleBox.SelectAll(); $titleBox.Focus() })
+
+        if ($form.ShowDialog() -ne [System.Windows.Forms.DialogResult]::OK) { return $null }
+        return [PSCustomObject]@{
+            CleanTitle  = $titleBox.Text.Trim()
+            AlbumArtist = $artistBox.Text.Trim()
+            SkipAudio   = $skipAudioBox.Checked
+            SkipVideo   = $skipVideoBox.Checked
         }
-        return $null
     }
     finally {
-        if (Test-Path $tempFile) { Remove-Item $tempFile -Force -ErrorAction SilentlyContinue }
+        $form.Dispose()
     }
 }
 
-# Get average FPS for the first video stream using ffprobe.
-function Get-VideoFps($filePath) {
-    # avg_frame_rate is typically like "30000/1001" or "30/1"
-    $rate = & ffprobe -v error -select_streams v:0 -show_entries stream=avg_frame_rate -of default=noprint_wrappers=1:nokey=1 "$filePath" 2>$null
-    if (-not $rate) { return $null }
-
-    $rateStr = ($rate | Select-Object -First 1).Trim()
-    if (-not $rateStr) { return $null }
+# Probe the first video stream with a single ffprobe call (JSON) and return its basic properties (Step 5c uses Duration).
+# Returns [PSCustomObject] with AvgFrameRate, Duration (seconds), CodecName, Width, Height; $null on failure.
+# Results are cached per (path, size, last-write time), so a file is probed once per session unless it changes.
+$script:videoProbeCache = @{}
+function Get-VideoProbe($filePath) {
+    $info = [System.IO.FileInfo]::new($filePath)
+    if (-not $info.Exists) { return $null }
+    $cacheKey = "$($info.FullName)|$($info.Length)|$($info.LastWriteTimeUtc.Ticks)"
+    if ($script:videoProbeCache.ContainsKey($cacheKey)) { return $script:videoProbeCache[$cacheKey] }
+
+    $json = & ffprobe -v error -select_streams v:0 -show_entries stream=avg_frame_rate,duration,codec_name,width,height:format=duration -of json "$filePath" 2>$null
+    if (-not $json) { return $null }
+
+    try { $probe = ($json -join "`n") | ConvertFrom-Json } catch { return $null }
+    $stream = $probe.streams | Select-Object -First 1
+    if (-not $stream) { return $null }
+
+    # MKV usually has no per-stream duration; fall back to the container's.
+    $durationStr = if ($stream.duration) { $stream.duration } else { $probe.format.duration }
+    $duration = $null
+    if ($durationStr) { try { $duration = [double]$durationStr } catch { } }
+
+    $result = [PSCustomObject]@{
+        AvgFrameRate = $stream.avg_frame_rate
+        Duration     = $duration
+        CodecName    = $stream.codec_name
+        Width        = $stream.width
+        Height       = $stream.height
+    }
+    $script:videoProbeCache[$cacheKey] = $result
+    return $result
+}
 
-    if ($rateStr -match '^(?<num>\d+)\s*/\s*(?<den>\d+)$') {
-        $num = [double]$Matches['num']
-        $den = [double]$Matches['den']
-        if ($den -le 0) { return $null }
-        return ($num / $den)
+# Snapshot of file name -> length for the work folder, taken with one enumeration (the lengths come with the
+# directory entries). It is the only folder checked several times per recording (original copy, audio, video);
+# the archive folders hold the whole library and are looked up once, so they keep a direct stat.
+# Reset whenever the work folder may have changed.
+$script:workDirListing = $null
+function Get-WorkDirListing {
+    if ($null -eq $script:workDirListing) {
+        $listing = [System.Collections.Generic.Dictionary[string, long]]::new([System.StringComparer]::OrdinalIgnoreCase)
+        $dirInfo = [System.IO.DirectoryInfo]::new($workDir)
+        if ($dirInfo.Exists) {
+            foreach ($file in $dirInfo.EnumerateFiles()) { $listing[$file.Name] = $file.Length }
+        }
+        $script:workDirListing = $listing
     }
+    return ,$script:workDirListing
+}
 
-    # Sometimes it's already a decimal
-    try { return [double]$rateStr } catch { return $null }
+# Check whether a file exists and is non-empty (work folder: from its snapshot; elsewhere: one stat call).
+# A zero-byte stub left by a crashed run counts as missing, so the step that produces it is redone instead of skipped.
+function Test-NonEmptyFile($filePath) {
+    if ([string]::Equals([System.IO.Path]::GetDirectoryName($filePath), $workDir, [System.StringComparison]::OrdinalIgnoreCase)) {
+        $length = 0L
+        return ((Get-WorkDirListing).TryGetValue([System.IO.Path]::GetFileName($filePath), [ref]$length) -and $length -gt 0)
+    }
+    $info = [System.IO.FileInfo]::new($filePath)
+    return ($info.Exists -and $info.Length -gt 0)
 }
 
 # Check whether a file is locked (used to wait for OBS to finish writing).
 function Test-IsFileLocked($filePath) {
     try {
-        $stream = [System.IO.File]::Open($filePath, 'Open', 'Read', 'None')
-        $stream.Close()
+        # Raw handle (no FileStream/buffer allocation per probe); share mode None fails while OBS holds it.
+        $handle = [System.IO.File]::OpenHandle($filePath, 'Open', 'Read', 'None')
+        $handle.Dispose()
+        return $false
+    }
+    catch [System.IO.FileNotFoundException], [System.IO.DirectoryNotFoundException] {
+        # Gone rather than locked: stop waiting and let the later steps report it.
         return $false
     }
-    catch {
-        return $true
+    catch [System.IO.IOException] {
+        # Only a sharing (32) or lock (33) violation means OBS still has the file open. Any other I/O error
+        # (device not ready, network path gone, ...) would never clear, so it surfaces instead of waiting forever.
+        $win32Error = ($_.Exception.InnerException ?? $_.Exception).HResult -band 0xFFFF
+        if ($win32Error -eq 32 -or $win32Error -eq 33) { return $true }
+        throw
+    }
+}
+
+# Latest encoded position (microseconds) from an ffmpeg -progress file, or $null if there is none yet.
+# The reader stays open on the job between calls, so each poll only reads the blocks appended since the last one.
+function Read-FfmpegProgress($job) {
+    if (-not $job.ProgressReader) {
+        if (-not [System.IO.File]::Exists($job.ProgressPath)) { return $job.OutTimeUs }
+        # ffmpeg keeps writing the file, so open it shared.
+        $stream = [System.IO.FileStream]::new($job.ProgressPath, [System.IO.FileMode]::Open, [System.IO.FileAccess]::Read, [System.IO.FileShare]::ReadWrite -bor [System.IO.FileShare]::Delete)
+        $job.ProgressReader = [System.IO.StreamReader]::new($stream)
+    }
+    $outTimeUs = 0L
+    while ($null -ne ($line = $job.ProgressReader.ReadLine())) {
+        if ($line.StartsWith("out_time_us=") -and [long]::TryParse($line.Substring(12), [ref]$outTimeUs)) {
+            $job.OutTimeUs = $outTimeUs
+        }
+    }
+    return $job.OutTimeUs
+}
+
+# Copy one file to several destinations in a single read pass (4 MB chunks), keeping its last-write time.
+# Used for the original recording, which would otherwise be read from disk once per destination.
+function Copy-FileToMany {
+    param(
+        [string]$Source,
+        [string[]]$Destinations
+    )
+
+    $sourceInfo = [System.IO.FileInfo]::new($Source)
+    $buffer = [byte[]]::new(4MB)
+    # bufferSize 1 = no FileStream buffer (we already read/write in large chunks); SequentialScan hints read-ahead.
+    $reader = [System.IO.FileStream]::new($Source, [System.IO.FileMode]::Open, [System.IO.FileAccess]::Read, [System.IO.FileShare]::Read, 1, [System.IO.FileOptions]::SequentialScan)
+    $writers = @()
+    $completed = $false
+    try {
+        foreach ($dest in $Destinations) {
+            $writers += [System.IO.FileStream]::new($dest, [System.IO.FileMode]::Create, [System.IO.FileAccess]::Write, [System.IO.FileShare]::None, 1, [System.IO.FileOptions]::SequentialScan)
+        }
+        while (($read = $reader.Read($buffer, 0, $buffer.Length)) -gt 0) {
+            foreach ($writer in $writers) { $writer.Write($buffer, 0, $read) }
+        }
+        $completed = $true
+    }
+    finally {
+        foreach ($writer in $writers) { try { $writer.Dispose() } catch { } }
+        $reader.Dispose()
+        # On any failure (disk full, drive removed, Ctrl+C/stopped job) remove the partial copies, like File.Copy
+        # does: a truncated non-empty file would otherwise pass Test-NonEmptyFile and never be redone.
+        if (-not $completed) {
+            foreach ($dest in $Destinations) { try { [System.IO.File]::Delete($dest) } catch { } }
+        }
+    }
+
+    foreach ($dest in $Destinations) {
+        [System.IO.File]::SetLastWriteTimeUtc($dest, $sourceInfo.LastWriteTimeUtc)
+    }
+}
+
+# Copy one file, replacing the destination. Large files (> 64 MB) on Windows go through CopyFileEx with
+# COPY_FILE_NO_BUFFERING: the outputs are written once and never reread, so they shouldn't evict the page cache.
+# Everything else (and any failure of the unbuffered copy) uses File.Copy. Both keep the last-write time.
+function Copy-FileFast {
+    param(
+        [string]$Source,
+        [string]$Destination
+    )
+
+    if ($IsWindows -and [System.IO.FileInfo]::new($Source).Length -gt 64MB) {
+        if (-not ('NativeFileCopy' -as [type])) {
+            # May run on a copy thread job (Step 6); another runspace may have compiled the type already.
+            $nativeCopySource = @"
+using System;
+using System.Runtime.InteropServices;
+public static class NativeFileCopy {
+    [DllImport("kernel32.dll", CharSet = CharSet.Unicode, SetLastError = true)]
+    public static extern bool CopyFileEx(string existingFileName, string newFileName, IntPtr progressRoutine, IntPtr data, IntPtr cancel, uint copyFlags);
+}
+"@
+            try { Add-Type -TypeDefinition $nativeCopySource } catch { }
+        }
+        $COPY_FILE_NO_BUFFERING = 0x1000
+        if (('NativeFileCopy' -as [type]) -and [NativeFileCopy]::CopyFileEx($Source, $Destination, [IntPtr]::Zero, [IntPtr]::Zero, [IntPtr]::Zero, $COPY_FILE_NO_BUFFERING)) {
+            return
+        }
+    }
+    [System.IO.File]::Copy($Source, $Destination, $true)
+}
+
+# --- Per-Video Processing (Steps 3-6) ---
+
+# Process one selected recording: wait for OBS, copy the original, encode, copy the outputs.
+function Invoke-VideoJob {
+    param(
+        [System.IO.FileInfo]$latestVideo,
+        [string]$cleanTitle,
+        [bool]$titleStartsWithDate,
+        [string]$albumArtist,
+        [bool]$doSkipAudio,
+        [bool]$doSkipVideo,
+        [datetime]$jobDate
+    )
+
+    # Earlier recordings in a batch have changed the work folder since its snapshot was taken.
+    $script:workDirListing = $null
+
+    # --- Step 3: Wait for OBS to Stop Recording ---
+    Write-Host "Monitoring: $($latestVideo.Name)" -ForegroundColor Cyan
+    Write-Host "OBS is currently recording... Waiting." -ForegroundColor Yellow
+    # Block on a change notification for the recording (OBS closing it updates LastWrite) instead of sleeping,
+    # so processing starts as soon as the handle is released. The wait timeout backs off from 100 ms to 1 s and
+    # doubles as a periodic re-check, e.g. for a release that happens before the watcher is armed.
+    $lockWatcher = [System.IO.FileSystemWatcher]::new($latestVideo.DirectoryName, $latestVideo.Name)
+    $lockWatcher.NotifyFilter = [System.IO.NotifyFilters]::LastWrite
+    try {
+        $lockPollMs = 100
+        while (Test-IsFileLocked -filePath $latestVideo.FullName) {
+            $null = $lockWatcher.WaitForChanged([System.IO.WatcherChangeTypes]::Changed, $lockPollMs)
+            $lockPollMs = [Math]::Min($lockPollMs * 2, 1000)
+        }
+    }
+    finally {
+        $lockWatcher.Dispose()
+    }
+
+    Write-Host "Recording finished! Starting processing..." -ForegroundColor Green
+
+    # --- Step 4: Define Names and Paths ---
+    # One timestamp (taken by the caller, which checks the base name against the batch) for both the
+    # file-name prefix and the daily folder, so they agree even across midnight.
+    $now = $jobDate
+    $baseName = Get-OutputBaseName -CleanTitle $cleanTitle -TitleStartsWithDate $titleStartsWithDate -Date $now
+    $null = $script:usedBaseNames.Add($baseName)
+
+    $audioOutPath = Join-Path $workDir "$baseName.opus"
+    $videoOutPath = Join-Path $workDir "$baseName.mp4"
+
+    # Paths for original copy (Step 4b)
+    $folderDateName  = $now.ToString("yyyy-MM-dd")
+    $dailyFolder     = Join-Path $destOrigVideo $folderDateName
+    $finalOrigPath   = Join-Path $dailyFolder "$baseName$($latestVideo.Extension)"
+    $workDirOrigPath = Join-Path $workDir "$baseName$($latestVideo.Extension)"
+
+    # --- Step 4b: Copy Original (to output folder + final folder, alongside the re-encode) ---
+    # The copy runs on a thread job while ffmpeg encodes from the recording (the OS read-ahead serves both
+    # readers); it is collected before Step 6.
+    $origCopyJob = $null
+    if (-not $debugProgram) {
+        Initialize-OutputDirectory $dailyFolder
+        # Both copies are fed from one read of the recording.
+        $origCopyTargets = @()
+        if (-not (Test-NonEmptyFile $workDirOrigPath)) {
+            Write-Host "  > Copying Original to work folder ($workDir)..."
+            $origCopyTargets += $workDirOrigPath
+        } else {
+            Write-Host "  > Original already in work folder. Skipping." -ForegroundColor DarkGray
+        }
+        if (-not (Test-NonEmptyFile $finalOrigPath)) {
+            Write-Host "  > Copying Original to $dailyFolder..."
+            $origCopyTargets += $finalOrigPath
+        } else {
+            Write-Host "  > Original already in final folder. Skipping." -ForegroundColor DarkGray
+        }
+        if ($origCopyTargets.Count -gt 0) {
+            $copyFileToManyDef = ${function:Copy-FileToMany}.ToString()
+            $origCopyJob = Start-ThreadJob -ArgumentList $latestVideo.FullName, $origCopyTargets -ScriptBlock {
+                param($src, [string[]]$dsts)
+                ${function:Copy-FileToMany} = $using:copyFileToManyDef
+                Copy-FileToMany -Source $src -Destinations $dsts
+            }
+        }
+    }
+
+    # --- Step 5: Process Files (NO OVERWRITE) ---
+    # Audio (CPU, libopus) and video (GPU, NVENC) encodes are independent, so both ffmpeg processes run at once.
+    # Each one logs to its own file in the work folder so their console output doesn't interleave.
+    $encodeJobs = @()
+
+    if ($capabilityProbe) {
+        $capabilities = Receive-Job -Job $capabilityProbe -Wait -AutoRemoveJob -ErrorAction SilentlyContinue
+        if ($capabilities) {
+            $script:hasNvenc = [bool]$capabilities.HasNvenc
+            $script:hasCudaScale = [bool]$capabilities.HasCudaScale
+        }
+        $script:capabilityProbe = $null
+    }
+
+    # 5a. Extract Audio (skipped if user chose skip audio)
+    if ($doSkipAudio) {
+        Write-Host "  > Audio step skipped (user choice)." -ForegroundColor DarkGray
+    } elseif (-not (Test-NonEmptyFile $audioOutPath)) {
+        Write-Host "  > Extracting Audio..."
+        $audioProgressPath = Join-Path $workDir "$baseName.audio.progress"
+        $audioArgs = Get-AudioEncodeArgs -inputPath $latestVideo.FullName -outputPath $audioOutPath -metaTitle $metaTitle -albumArtist $albumArtist -progressPath $audioProgressPath
+        Write-Host "  > ffmpeg audio args:" -ForegroundColor Magenta
+        Write-Host "    ffmpeg $audioArgs"
+        $audioLogPath = Join-Path $workDir "$baseName.audio.log"
+        Write-Host "    log: $audioLogPath"
+        $audioProc = Start-Process -FilePath "ffmpeg" -ArgumentList $audioArgs -NoNewWindow -PassThru -RedirectStandardError $audioLogPath
+        $null = $audioProc.Handle  # keep the handle so ExitCode is available after the process exits
+        $encodeJobs += [PSCustomObject]@{ Name = "audio"; Process = $audioProc; OutputPath = $audioOutPath; LogPath = $audioLogPath; ProgressPath = $audioProgressPath; ProgressReader = $null; OutTimeUs = $null }
+    } else {
+        Write-Host "  > Audio already exists. Skipping." -ForegroundColor DarkGray
+    }
+
+    # 5b. Re-encode Video (H.265 480p: hevc_nvenc, or libx265 when NVENC is unavailable) (skipped if user chose skip video)
+    if ($doSkipVideo) {
+        Write-Host "  > Video re-encode skipped (user choice)." -ForegroundColor DarkGray
+    } elseif (-not (Test-NonEmptyFile $videoOutPath)) {
+        $videoEncoder = if (Test-HasNvenc) { "hevc_nvenc" } else { "libx265" }
+        Write-Host "  > Re-encoding Video (H.265 $videoEncoder 480p)..."
+        $videoProgressPath = Join-Path $workDir "$baseName.video.progress"
+        $h265Args = Get-H265480EncodeArgs -inputPath $latestVideo.FullName -outputPath $videoOutPath -metaTitle $metaTitle -progressPath $videoProgressPath
+        Write-Host "  > ffmpeg H.265 480p args:" -ForegroundColor Magenta
+        Write-Host "    ffmpeg $h265Args"
+        $videoLogPath = Join-Path $workDir "$baseName.video.log"
+        Write-Host "    log: $videoLogPath"
+        $videoProc = Start-Process -FilePath "ffmpeg" -ArgumentList $h265Args -NoNewWindow -PassThru -RedirectStandardError $videoLogPath
+        $null = $videoProc.Handle
+        $encodeJobs += [PSCustomObject]@{ Name = "video"; Process = $videoProc; OutputPath = $videoOutPath; LogPath = $videoLogPath; ProgressPath = $videoProgressPath; ProgressReader = $null; OutTimeUs = $null }
+    } else {
+        Write-Host "  > Compressed video already exists. Skipping." -ForegroundColor DarkGray
+    }
+
+    # 5c. Wait for the encodes (Step 6 copies their finished outputs), then report each result in order.
+    if ($encodeJobs.Count -gt 0) {
+        Write-Host "  > Waiting for ffmpeg to finish..."
+        # Show each job's position against the recording's duration, refreshed once a second.
+        $probe = Get-VideoProbe $latestVideo.FullName
+        $durationUs = if ($probe -and $probe.Duration) { [double]$probe.Duration * 1e6 } else { 0 }
+        try {
+            while ($pendingJob = $encodeJobs | Where-Object { -not $_.Process.HasExited } | Select-Object -First 1) {
+                $null = $pendingJob.Process.WaitForExit(1000)
+                if ($durationUs -le 0) { continue }
+                for ($i = 0; $i -lt $encodeJobs.Count; $i++) {
+                    $outTimeUs = Read-FfmpegProgress $encodeJobs[$i]
+                    if ($null -eq $outTimeUs) { continue }
+                    $percent = [int][Math]::Min(100, 100 * $outTimeUs / $durationUs)
+                    Write-Progress -Id ($i + 1) -Activity "ffmpeg $($encodeJobs[$i].Name)" -Status "$percent%" -PercentComplete $percent
+                }
+            }
+        }
+        finally {
+            for ($i = 0; $i -lt $encodeJobs.Count; $i++) {
+                Write-Progress -Id ($i + 1) -Activity "ffmpeg $($encodeJobs[$i].Name)" -Completed
+                if ($encodeJobs[$i].ProgressReader) { $encodeJobs[$i].ProgressReader.Dispose() }
+                try { [System.IO.File]::Delete($encodeJobs[$i].ProgressPath) } catch { }
+            }
+        }
+        foreach ($job in $encodeJobs) {
+            $job.Process.WaitForExit()
+            $exitCode = $job.Process.ExitCode
+            if ($exitCode -eq 0) {
+                Write-Host "  > ffmpeg $($job.Name) finished." -ForegroundColor Green
+                # The log only matters when something failed; don't leave it in the user's output folder.
+                try { [System.IO.File]::Delete($job.LogPath) } catch { }
+            } else {
+                Write-Host "  > ffmpeg $($job.Name) failed (exit code $exitCode). See $($job.LogPath)" -ForegroundColor Red
+                # Drop the partial output so it is neither copied below nor skipped as "already exists" next run.
+                try { [System.IO.File]::Delete($job.OutputPath) } catch { }
+                $script:failedJobCount++
+            }
+        }
+    }
+
+    # --- Step 6: Copy to Destinations (NO OVERWRITE) ---
+    if (-not $debugProgram) {
+
+        # 6a. Original copied in Step 4b (to work folder + final folder); wait for that copy to finish.
+        if ($origCopyJob) {
+            Write-Host "  > Waiting for the original copy to finish..."
+            # A failed thread job only writes a (non-terminating) error record; collect it so the run is reported as failed.
+            Receive-Job -Job $origCopyJob -Wait -AutoRemoveJob -ErrorVariable origCopyErrors
+            if ($origCopyErrors) {
+                Write-Host "  > Copying the original failed: $($origCopyErrors[0])" -ForegroundColor Red
+                $script:failedCopyCount++
+            }
+        }
+        # The encodes and copies above have changed the work folder; re-read it below.
+        $script:workDirListing = $null
+        # 6b/6c use Copy-FileFast, which hands the copy to the OS in one call (CopyFileEx on Windows,
+        # copy_file_range/sendfile on Linux) instead of a user-space read/write loop.
+        # The copies go to different destination folders, so they are collected first and run together (6d).
+        $outputCopies = @()
+
+        # 6b. Copy Audio (skipped if user chose skip audio)
+        if ($doSkipAudio) {
+            Write-Host "  > Audio copy skipped (user choice)." -ForegroundColor DarkGray
+        } else {
+            $finalAudioPath = Join-Path $destAudio "$baseName.opus"
+            if (-not (Test-NonEmptyFile $audioOutPath)) {
+                Write-Host "  > No audio output to copy. Skipping." -ForegroundColor DarkGray
+            } elseif (-not (Test-NonEmptyFile $finalAudioPath)) {
+                Write-Host "  > Copying Audio..."
+                $outputCopies += [PSCustomObject]@{ Source = $audioOutPath; Destination = $finalAudioPath }
+            } else {
+                Write-Host "  > Audio file already in destination. Skipping." -ForegroundColor DarkGray
+            }
+        }
+
+        # 6c. Copy Compressed Video (skipped if user chose skip video)
+        if ($doSkipVideo) {
+            Write-Host "  > Compressed video copy skipped (user choice)." -ForegroundColor DarkGray
+        } else {
+            $finalCompPath = Join-Path $destCompVideo "$baseName.mp4"
+            if (-not (Test-NonEmptyFile $videoOutPath)) {
+                Write-Host "  > No compressed video to copy. Skipping." -ForegroundColor DarkGray
+            } elseif (-not (Test-NonEmptyFile $finalCompPath)) {
+                Write-Host "  > Copying Compressed Video..."
+                $outputCopies += [PSCustomObject]@{ Source = $videoOutPath; Destination = $finalCompPath }
+            } else {
+                Write-Host "  > Compressed video already in destination. Skipping." -ForegroundColor DarkGray
+            }
+        }
+
+        # 6d. Run the collected copies, one thread job each when there is more than one.
+        # Each failure is reported and counted in $failedCopyCount, so the run doesn't end as a success.
+        if ($outputCopies.Count -eq 1) {
+            try {
+                Copy-FileFast -Source $outputCopies[0].Source -Destination $outputCopies[0].Destination
+            }
+            catch {
+                Write-Host "  > Copying to $($outputCopies[0].Destination) failed: $_" -ForegroundColor Red
+                $script:failedCopyCount++
+            }
+        } elseif ($outputCopies.Count -gt 1) {
+            $copyFileFastDef = ${function:Copy-FileFast}.ToString()
+            foreach ($copy in $outputCopies) {
+                $copy | Add-Member -NotePropertyName Job -NotePropertyValue (Start-ThreadJob -ArgumentList $copy.Source, $copy.Destination -ScriptBlock {
+                    param($src, $dst)
+                    ${function:Copy-FileFast} = $using:copyFileFastDef
+                    Copy-FileFast -Source $src -Destination $dst
+                })
+            }
+            foreach ($copy in $outputCopies) {
+                # A failed thread job only writes a (non-terminating) error record; collect it per copy.
+                Receive-Job -Job $copy.Job -Wait -AutoRemoveJob -ErrorVariable copyErrors
+                if ($copyErrors) {
+                    Write-Host "  > Copying to $($copy.Destination) failed: $($copyErrors[0])" -ForegroundColor Red
+                    $script:failedCopyCount++
+                }
+            }
+        }
+
+    }
+    else {
+        Write-Host "Copy step skipped (debug mode)." -ForegroundColor Cyan
     }
 }
 
@@ -320,14 +757,23 @@ if ($Title -and $Artist) {
     $cleanTitle = $Title.Trim()
     $albumArtist = $Artist.Trim()
 }
-elseif (Test-Path $titleFilePath) {
-    # Fallback: use existing title.txt file (2 non-empty lines: title, artist)
-    $lines = Get-Content $titleFilePath -Encoding UTF8
-    $validLines = $lines | Where-Object { -not [string]::IsNullOrWhiteSpace($_) }
+elseif ([System.IO.File]::Exists($titleFilePath) -and [System.IO.FileInfo]::new($titleFilePath).Length -le 1MB) {
+    # Fallback: use existing title.txt file (2 non-empty lines: title, artist).
+    # Read line by line and stop at the second non-empty line; an absurdly large file (> 1 MB) is ignored unread.
+    $validLines = [System.Collections.Generic.List[string]]::new()
+    $titleReader = [System.IO.StreamReader]::new($titleFilePath, [System.Text.Encoding]::UTF8)
+    try {
+        while ($validLines.Count -lt 2 -and $null -ne ($line = $titleReader.ReadLine())) {
+            if (-not [string]::IsNullOrWhiteSpace($line)) { $validLines.Add($line.Trim()) }
+        }
+    }
+    finally {
+        $titleReader.Dispose()
+    }
 
     if ($validLines.Count -ge 2) {
-        $cleanTitle = $validLines[0].Trim() # Line 1: Filename part
-        $albumArtist = $validLines[1].Trim() # Line 2: Metadata Artist
+        $cleanTitle = $validLines[0] # Line 1: Filename part
+        $albumArtist = $validLines[1] # Line 2: Metadata Artist
     }
 }
 
@@ -337,130 +783,93 @@ if (-not $cleanTitle -or -not $albumArtist) {
 }
 
 # Normalize leading date to YYYYMMDD (remove slashes) for consistency
-$cleanTitle = Normalize-LeadingDateInTitle -Text $cleanTitle
+$normalizedTitle = Normalize-LeadingDateInTitle -Text $cleanTitle
+$cleanTitle = $normalizedTitle.Text
+$titleStartsWithDate = $normalizedTitle.HasLeadingDate
 
 # Effective skip flags are now purely from CLI switches
 $doSkipAudio = [bool]$skipAudio
 $doSkipVideo = [bool]$skipVideo
 
-# --- Step 2: Select Video (file dialog, opens in user's Videos folder) ---
-# $videosFolder = Join-Path $env:USERPROFILE "Videos"
-# if (-not (Test-Path $videosFolder)) { $videosFolder = $videoSourceDir }
-$selectedPath = Show-FileSelector -InitialDirectory $videoSourceDir
-if (-not $selectedPath) { exit 0 }
-$latestVideo = Get-Item $selectedPath
-Write-Host "Selected: $($latestVideo.Name)" -ForegroundColor Green
-
-# --- Step 3: Wait for OBS to Stop Recording ---
-Write-Host "Monitoring: $($latestVideo.Name)" -ForegroundColor Cyan
-Write-Host "OBS is currently recording... Waiting." -ForegroundColor Yellow
-while (Test-IsFileLocked -filePath $latestVideo.FullName) {
-    Start-Sleep -Milliseconds 1000
-}
-
-Write-Host "Recording finished! Starting processing..." -ForegroundColor Green
-
-# --- Step 4: Define Names and Paths ---
-# Sanitize title so backslashes etc. don't break paths.
-$safeTitle = Get-SafeFileName -Text $cleanTitle
-# If title already starts with a date (e.g. 20260204, 2026-02-04, 2026\02\04), don't add our own.
-$titleStartsWithDate = $cleanTitle -match '^\s*(\d{8}|\d{4}[-/\s\\]?\d{2}[-/\s\\]?\d{2})'
-$baseName = if ($titleStartsWithDate) { $safeTitle } else { (Get-Date -Format "yyyyMMdd ") + $safeTitle }
-
-$audioOutPath = Join-Path $workDir "$baseName.opus"
-$videoOutPath = Join-Path $workDir "$baseName.mp4"
-
-# Paths for original copy (used before encoding)
-$folderDateName  = Get-Date -Format "yyyy-MM-dd"
-$dailyFolder     = Join-Path $destOrigVideo $folderDateName
-$finalOrigPath   = Join-Path $dailyFolder "$baseName$($latestVideo.Extension)"
-$workDirOrigPath = Join-Path $workDir "$baseName$($latestVideo.Extension)"
-
-# --- Step 4b: Copy Original First (to output folder + final folder, before re-encode) ---
-if (-not $debugProgram) {
-    if (-not (Test-Path $dailyFolder)) {
-        New-Item -ItemType Directory -Path $dailyFolder -Force | Out-Null
-    }
-    if (-not (Test-Path $workDirOrigPath)) {
-        Write-Host "  > Copying Original to work folder ($workDir)..."
-        Copy-Item -Path $latestVideo.FullName -Destination $workDirOrigPath
-    } else {
-        Write-Host "  > Original already in work folder. Skipping." -ForegroundColor DarkGray
-    }
-    if (-not (Test-Path $finalOrigPath)) {
-        Write-Host "  > Copying Original to $dailyFolder..."
-        Copy-Item -Path $latestVideo.FullName -Destination $finalOrigPath
-    } else {
-        Write-Host "  > Original already in final folder. Skipping." -ForegroundColor DarkGray
+# Run the ffmpeg capability probes on a background thread while the user is in the file dialog.
+# Functions don't cross runspaces, so their definitions are handed over as text. Results are collected before Step 5.
+$capabilityProbe = $null
+try {
+    $testHasNvencDef = ${function:Test-HasNvenc}.ToString()
+    $testHasCudaScaleDef = ${function:Test-HasCudaScale}.ToString()
+    $capabilityProbe = Start-ThreadJob -ScriptBlock {
+        ${function:Test-HasNvenc} = $using:testHasNvencDef
+        ${function:Test-HasCudaScale} = $using:testHasCudaScaleDef
+        [PSCustomObject]@{ HasNvenc = (Test-HasNvenc); HasCudaScale = (Test-HasCudaScale) }
     }
-}
-
-# --- Step 5: Process Files (NO OVERWRITE) ---
-
-# 5a. Extract Audio (skipped if user chose skip audio)
-if ($doSkipAudio) {
-    Write-Host "  > Audio step skipped (user choice)." -ForegroundColor DarkGray
-} elseif (-not (Test-Path $audioOutPath)) {
-    Write-Host "  > Extracting Audio..."
-    $metaTitle = "الشيخ محمد فواز النمر"
-    $audioArgs = Get-AudioEncodeArgs -inputPath $latestVideo.FullName -outputPath $audioOutPath -metaTitle $metaTitle -albumArtist $albumArtist
-    Write-Host "  > ffmpeg audio args:" -ForegroundColor Magenta
-    Write-Host "    ffmpeg $audioArgs"
-    $null = Start-Process -FilePath "ffmpeg" -ArgumentList $audioArgs -Wait -NoNewWindow -PassThru
-} else {
-    Write-Host "  > Audio already exists. Skipping." -ForegroundColor DarkGray
-}
-
-# 5b. Re-encode Video (H.265 hevc_nvenc 480p) (skipped if user chose skip video)
-if ($doSkipVideo) {
-    Write-Host "  > Video re-encode skipped (user choice)." -ForegroundColor DarkGray
-} elseif (-not (Test-Path $videoOutPath)) {
-    Write-Host "  > Re-encoding Video (H.265 hevc_nvenc 480p)..."
-    $metaTitle = "الشيخ محمد فواز النمر"
-    $h265Args = Get-H265480EncodeArgs -inputPath $latestVideo.FullName -outputPath $videoOutPath -metaTitle $metaTitle
-    Write-Host "  > ffmpeg H.265 480p args:" -ForegroundColor Magenta
-    Write-Host "    ffmpeg $h265Args"
-    $null = Start-Process -FilePath "ffmpeg" -ArgumentList $h265Args -Wait -NoNewWindow -PassThru
-} else {
-    Write-Host "  > Compressed video already exists. Skipping." -ForegroundColor DarkGray
-}
-
-# --- Step 6: Copy to Destinations (NO OVERWRITE) ---
-if (-not $debugProgram) {
-
-    # 6a. Original already copied in Step 4b (to work folder + final folder).
+} catch { }
 
-    # 6b. Copy Audio (skipped if user chose skip audio)
-    if ($doSkipAudio) {
-        Write-Host "  > Audio copy skipped (user choice)." -ForegroundColor DarkGray
-    } else {
-        $finalAudioPath = Join-Path $destAudio "$baseName.opus"
-        if (-not (Test-Path $finalAudioPath)) {
-            Write-Host "  > Copying Audio..."
-            Copy-Item -Path $audioOutPath -Destination $finalAudioPath
-        } else {
-            Write-Host "  > Audio file already in destination. Skipping." -ForegroundColor DarkGray
-        }
+# --- Step 2: Select Video (file dialog, opens in user's Videos folder) ---
+# With -batch, Steps 2-6 repeat for further recordings (title/artist confirmed per recording)
+# until the file or title dialog is cancelled; the capability probes and loaded types are reused.
+$jobCount = 0
+$failedJobCount = 0
+$failedCopyCount = 0
+# Base names already produced in this run: a repeat would find every output "already exists" and skip
+# the recording entirely, so the batch dialog refuses it.
+$usedBaseNames = [System.Collections.Generic.HashSet[string]]::new([System.StringComparer]::OrdinalIgnoreCase)
+while ($true) {
+    # $videosFolder = Join-Path $env:USERPROFILE "Videos"
+    # if (-not (Test-Path $videosFolder)) { $videosFolder = $videoSourceDir }
+    $selectedPath = Show-FileSelector -InitialDirectory $videoSourceDir
+    if (-not $selectedPath) {
+        if ($jobCount -eq 0) { exit 0 }
+        break
     }
-
-    # 6c. Copy Compressed Video (skipped if user chose skip video)
-    if ($doSkipVideo) {
-        Write-Host "  > Compressed video copy skipped (user choice)." -ForegroundColor DarkGray
-    } else {
-        $finalCompPath = Join-Path $destCompVideo "$baseName.mp4"
-        if (-not (Test-Path $finalCompPath)) {
-            Write-Host "  > Copying Compressed Video..."
-            Copy-Item -Path $videoOutPath -Destination $finalCompPath
-        } else {
-            Write-Host "  > Compressed video already in destination. Skipping." -ForegroundColor DarkGray
+    $latestVideo = [System.IO.FileInfo]::new($selectedPath)
+    Write-Host "Selected: $($latestVideo.Name)" -ForegroundColor Green
+    # Date used for this recording's base name and daily folder (and for the batch duplicate check below).
+    $jobDate = Get-Date
+
+    if ($jobCount -gt 0) {
+        # Later recordings in a batch: confirm/edit title, artist and skip flags (pre-filled from the previous one).
+        # Asked again (with a warning) while a field is empty or the title gives a base name already used in this
+        # batch; only Cancel ends the batch.
+        while ($true) {
+            $confirmed = Show-TitleConfirmationDialog -TitleText $cleanTitle -ArtistText $albumArtist -InitialSkipAudio:$doSkipAudio -InitialSkipVideo:$doSkipVideo
+            if (-not $confirmed) { break }
+            if (-not $confirmed.CleanTitle -or -not $confirmed.AlbumArtist) {
+                $null = [System.Windows.Forms.MessageBox]::Show("Both Title and Artist must be filled in.", "Missing data", "OK", "Warning")
+            } else {
+                $normalizedTitle = Normalize-LeadingDateInTitle -Text $confirmed.CleanTitle
+                $candidateBaseName = Get-OutputBaseName -CleanTitle $normalizedTitle.Text -TitleStartsWithDate $normalizedTitle.HasLeadingDate -Date $jobDate
+                if (-not $usedBaseNames.Contains($candidateBaseName)) { break }
+                $null = [System.Windows.Forms.MessageBox]::Show("""$candidateBaseName"" was already used for an earlier recording in this batch. Enter a different title.", "Duplicate title", "OK", "Warning")
+            }
+            # Re-show the dialog with what was entered.
+            $cleanTitle = $confirmed.CleanTitle
+            $albumArtist = $confirmed.AlbumArtist
+            $doSkipAudio = [bool]$confirmed.SkipAudio
+            $doSkipVideo = [bool]$confirmed.SkipVideo
         }
+        if (-not $confirmed) { break }
+        $cleanTitle = $normalizedTitle.Text
+        $titleStartsWithDate = $normalizedTitle.HasLeadingDate
+        $albumArtist = $confirmed.AlbumArtist
+        $doSkipAudio = [bool]$confirmed.SkipAudio
+        $doSkipVideo = [bool]$confirmed.SkipVideo
     }
 
-}
-else {
-    Write-Host "Copy step skipped (debug mode)." -ForegroundColor Cyan
+    # --- Steps 3-6 ---
+    Invoke-VideoJob -latestVideo $latestVideo -cleanTitle $cleanTitle -titleStartsWithDate $titleStartsWithDate -albumArtist $albumArtist -doSkipAudio $doSkipAudio -doSkipVideo $doSkipVideo -jobDate $jobDate
+    $jobCount++
+
+    if (-not $batch) { break }
 }
 
 # --- Final Step: Exit ---
+# Pause briefly so the last message can be read before the console closes; not when output is redirected
+# (log file, scheduler) or under CI, where nobody is watching.
+$pauseBeforeExit = [Environment]::UserInteractive -and -not [Console]::IsOutputRedirected -and -not $env:CI
+if ($failedJobCount -gt 0 -or $failedCopyCount -gt 0) {
+    Write-Host "Finished with $failedJobCount failed ffmpeg job(s) and $failedCopyCount failed copy(ies). Exiting." -ForegroundColor Red
+    if ($pauseBeforeExit) { Start-Sleep -Seconds 1 }
+    exit 1
+}
 Write-Host "All tasks completed successfully. Exiting." -ForegroundColor Green
-Start-Sleep -Seconds 1
+if ($pauseBeforeExit) { Start-Sleep -Seconds 1 }
@@ -1,22 +1,45 @@
 from __future__ import annotations
 
-import argparse
+import functools
+import os
+import shutil
 import subprocess
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import (
-    QApplication,
-    QWidget,
-    QLabel,
-    QLineEdit,
-    QCheckBox,
-    QPushButton,
-    QHBoxLayout,
-    QVBoxLayout,
-    QMessageBox,
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    import argparse
+
+# Resolved once per process; the launcher and main.ps1 live side by side.
+_REPO_ROOT = Path(__file__).resolve().parent
+_PS1_PATH = _REPO_ROOT / "main.ps1"
+# Full path to pwsh, looked up on PATH once (None if PowerShell 7.2+ isn't installed).
+_PWSH = shutil.which("pwsh")
+# Checked once at startup so the GUI can refuse to start a run that could never launch.
+_PWSH_OK = _PWSH is not None and os.access(_PWSH, os.X_OK)
+_NO_PWSH_MSG: Final = (
+    "Could not find 'pwsh' on PATH. "
+    "Make sure PowerShell 7.2+ is installed and 'pwsh' is available."
 )
+# main.ps1 switches, in the order of run_powershell's boolean parameters.
+_SWITCHES = ("-skipAudio", "-skipVideo", "-debugProgram", "-batch")
+# Optional prefill for the GUI: ~/Desktop/title.txt (cross-platform home + Desktop).
+_TITLE_FILE = Path.home() / "Desktop" / "title.txt"
+
+
+@dataclass(frozen=True)
+class Prefill:
+    """Initial GUI state, resolved once from CLI args and title.txt."""
+
+    title: str | None = None
+    artist: str | None = None
+    skip_audio: bool = False
+    skip_video: bool = False
+    debug: bool = False
+    batch: bool = False
+    encoder_threads: int | None = None
 
 
 def run_powershell(
@@ -25,62 +48,92 @@ def run_powershell(
     skip_audio: bool,
     skip_video: bool,
     debug_program: bool,
+    batch: bool = False,
+    encoder_threads: int | None = None,
 ) -> int:
     """
     Invoke main.ps1 via pwsh with the collected parameters.
     Returns the PowerShell process return code.
     """
-    repo_root = Path(__file__).resolve().parent
-    ps1_path = repo_root / "main.ps1"
+    if not _PS1_PATH.is_file():
+        print(f"Error: Could not find PowerShell script: {_PS1_PATH}", file=sys.stderr)
+        return 1
 
-    if not ps1_path.exists():
-        print(f"Error: Could not find PowerShell script: {ps1_path}", file=sys.stderr)
+    if _PWSH is None or not _PWSH_OK:
+        print(f"Error: {_NO_PWSH_MSG}", file=sys.stderr)
         return 1
 
     cmd: list[str] = [
-        "pwsh",
+        _PWSH,
         "-NoLogo",
         "-NonInteractive",
         "-File",
-        str(ps1_path),
+        str(_PS1_PATH),
         "-Title",
         title,
         "-Artist",
         artist,
+        *(
+            switch
+            for switch, enabled in zip(_SWITCHES, (skip_audio, skip_video, debug_program, batch))
+            if enabled
+        ),
     ]
 
-    if skip_audio:
-        cmd.append("-skipAudio")
-    if skip_video:
-        cmd.append("-skipVideo")
-    if debug_program:
-        cmd.append("-debugProgram")
+    if encoder_threads:
+        cmd += ["-encoderThreads", str(encoder_threads)]
 
     # Fire-and-forget: start PowerShell and return immediately so the GUI can close.
     try:
-        subprocess.Popen(cmd, cwd=str(repo_root))
-    except FileNotFoundError:
-        print(
-            "Error: Could not find 'pwsh' on PATH. "
-            "Make sure PowerShell 7+ is installed and 'pwsh' is available.",
-            file=sys.stderr,
-        )
+        subprocess.Popen(cmd, cwd=str(_REPO_ROOT))
+    except OSError as exc:
+        print(f"Error: Could not start '{_PWSH}': {exc}", file=sys.stderr)
         return 1
 
     return 0
 
 
-def main(
-    initial_title: str | None = None,
-    initial_artist: str | None = None,
-    initial_skip_audio: bool = False,
-    initial_skip_video: bool = False,
-    initial_debug: bool = False,
-) -> None:
+@functools.lru_cache(maxsize=1)
+def _load_title_txt() -> tuple[str, str] | None:
+    """
+    Return (title, artist) from the first two non-empty lines of title.txt,
+    or None if the file is missing, unreadable or too short. Read once per process.
+    """
+    try:
+        # Stream the file and stop at the second non-empty line; the rest is never read.
+        valid: list[str] = []
+        # errors="replace": a stray non-UTF-8 byte costs a character, not the whole prefill.
+        with _TITLE_FILE.open("r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                stripped = line.strip()
+                if stripped:
+                    valid.append(stripped)
+                    if len(valid) == 2:
+                        return valid[0], valid[1]
+    except OSError:
+        # Missing or unreadable file: just ignore and fall back to args only.
+        pass
+    return None
+
+
+def main(prefill: Prefill = Prefill()) -> None:
     """
     Launch a Qt-based dialog to collect title/artist and skip flags,
     then invoke the PowerShell script.
     """
+    # Imported here so `--help` and argument errors don't pay for loading Qt.
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import (
+        QApplication,
+        QWidget,
+        QLabel,
+        QLineEdit,
+        QCheckBox,
+        QPushButton,
+        QHBoxLayout,
+        QVBoxLayout,
+        QMessageBox,
+    )
 
     app = QApplication.instance() or QApplication(sys.argv)
 
@@ -93,45 +146,57 @@ def main(
             self.title_edit = QLineEdit(self)
             self.artist_edit = QLineEdit(self)
 
-            if initial_title:
-                self.title_edit.setText(initial_title)
-            if initial_artist:
-                self.artist_edit.setText(initial_artist)
+            if prefill.title:
+                self.title_edit.setText(prefill.title)
+            if prefill.artist:
+                self.artist_edit.setText(prefill.artist)
 
             self.skip_audio_cb = QCheckBox("Skip audio", self)
-            self.skip_audio_cb.setChecked(bool(initial_skip_audio))
+            self.skip_audio_cb.setChecked(prefill.skip_audio)
 
             self.skip_video_cb = QCheckBox("Skip video", self)
-            self.skip_video_cb.setChecked(bool(initial_skip_video))
+            self.skip_video_cb.setChecked(prefill.skip_video)
+
+            self.batch_cb = QCheckBox("Batch mode (process several recordings)", self)
+            self.batch_cb.setChecked(prefill.batch)
 
             self.debug_cb: QCheckBox | None = None
-            if initial_debug:
+            if prefill.debug:
                 self.debug_cb = QCheckBox("Debug mode", self)
                 self.debug_cb.setChecked(True)
 
+            # Option checkboxes in display order (debug only when requested).
+            checkboxes = [self.skip_audio_cb, self.skip_video_cb, self.batch_cb]
+            if self.debug_cb is not None:
+                checkboxes.append(self.debug_cb)
+
             ok_btn = QPushButton("OK", self)
             cancel_btn = QPushButton("Cancel", self)
 
             ok_btn.clicked.connect(self.on_ok)  # type: ignore[arg-type]
             cancel_btn.clicked.connect(self.close)  # type: ignore[arg-type]
 
+            # Without pwsh the run can't start; say so up front instead of after OK.
+            pwsh_missing_label: QLabel | None = None
+            if not _PWSH_OK:
+                ok_btn.setEnabled(False)
+                pwsh_missing_label = QLabel(_NO_PWSH_MSG, self)
+                pwsh_missing_label.setWordWrap(True)
+                pwsh_missing_label.setStyleSheet("color: red;")
+
             # Layout
             form_layout = QVBoxLayout()
 
-            title_row = QHBoxLayout()
-            title_row.addWidget(QLabel("Title:", self))
-            title_row.addWidget(self.title_edit)
-            form_layout.addLayout(title_row)
+            for label, edit in (("Title:", self.title_edit), ("Artist:", self.artist_edit)):
+                row = QHBoxLayout()
+                row.addWidget(QLabel(label, self))
+                row.addWidget(edit)
+                form_layout.addLayout(row)
 
-            artist_row = QHBoxLayout()
-            artist_row.addWidget(QLabel("Artist:", self))
-            artist_row.addWidget(self.artist_edit)
-            form_layout.addLayout(artist_row)
-
-            form_layout.addWidget(self.skip_audio_cb)
-            form_layout.addWidget(self.skip_video_cb)
-            if self.debug_cb is not None:
-                form_layout.addWidget(self.debug_cb)
+            for checkbox in checkboxes:
+                form_layout.addWidget(checkbox)
+            if pwsh_missing_label is not None:
+                form_layout.addWidget(pwsh_missing_label)
 
             buttons_row = QHBoxLayout()
             buttons_row.addStretch(1)
@@ -145,6 +210,10 @@ def main(
             self.setLayout(main_layout)
 
         def on_ok(self) -> None:
+            if not _PWSH_OK:
+                # OK is disabled; Enter still lands here.
+                return
+
             title = self.title_edit.text().strip()
             artist = self.artist_edit.text().strip()
 
@@ -163,6 +232,7 @@ def main(
             skip_audio = self.skip_audio_cb.isChecked()
             skip_video = self.skip_video_cb.isChecked()
             debug_program = bool(self.debug_cb and self.debug_cb.isChecked())
+            batch = self.batch_cb.isChecked()
 
             # Any errors (e.g. pwsh not found) are printed to stderr in the console.
             run_powershell(
@@ -171,6 +241,8 @@ def main(
                 skip_audio=skip_audio,
                 skip_video=skip_video,
                 debug_program=debug_program,
+                batch=batch,
+                encoder_threads=prefill.encoder_threads,
             )
 
         def keyPressEvent(self, event) -> None:  # type: ignore[override]
@@ -188,8 +260,28 @@ def main(
     app.exec()
 
 
-if __name__ == "__main__":
-    # Always parse CLI args, but use them only to pre-fill the GUI.
+def _show_error(title: str, text: str) -> None:
+    """
+    Show a modal error box (creating the QApplication if needed); fall back to stderr without Qt.
+    """
+    print(f"Error: {text}", file=sys.stderr)
+    try:
+        from PySide6.QtWidgets import QApplication, QMessageBox
+    except ImportError:
+        return
+    # Keep a reference so the QApplication stays alive while the box is shown.
+    app = QApplication.instance() or QApplication(sys.argv)
+    QMessageBox.critical(None, title, text)
+    del app
+
+
+@functools.lru_cache(maxsize=1)
+def _get_parser() -> argparse.ArgumentParser:
+    """
+    Build the CLI parser once per process (argparse is imported on first use).
+    """
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Python launcher + GUI for main.ps1 (Video Processor).",
         add_help=True,
@@ -219,40 +311,41 @@ if __name__ == "__main__":
         action="store_true",
         help="Pre-check 'Debug mode' in the GUI (maps to -debugProgram).",
     )
+    parser.add_argument(
+        "-batch",
+        action="store_true",
+        help="Pre-check 'Batch mode' in the GUI (maps to -batch).",
+    )
+    parser.add_argument(
+        "-encoderThreads",
+        type=int,
+        help="Cap the libx265 thread pool used when NVENC is unavailable (maps to -encoderThreads).",
+    )
+
+    return parser
 
-    args = parser.parse_args()
+
+if __name__ == "__main__":
+    # Always parse CLI args, but use them only to pre-fill the GUI.
+    args = _get_parser().parse_args()
 
     # Optionally pre-populate from a Desktop title.txt (first two non-empty lines).
-    # Looks for ~/Desktop/title.txt (cross-platform home + Desktop).
-    repo_root = Path(__file__).resolve().parent
-    desktop = Path.home() / "Desktop"
-    title_file = desktop / "title.txt"
-    file_title: str | None = None
-    file_artist: str | None = None
-    if title_file.exists():
-        try:
-            lines = [line.strip() for line in title_file.read_text(encoding="utf-8").splitlines()]
-            valid = [ln for ln in lines if ln]
-            if len(valid) >= 2:
-                file_title = valid[0]
-                file_artist = valid[1]
-        except Exception:
-            # If anything goes wrong reading/parsing, just ignore and fall back to args only.
-            pass
+    file_title, file_artist = _load_title_txt() or (None, None)
 
     # CLI args win over title.txt; title.txt is only used when args are missing.
-    initial_title = args.Title or file_title
-    initial_artist = args.Artist or file_artist
+    prefill = Prefill(
+        title=args.Title or file_title,
+        artist=args.Artist or file_artist,
+        skip_audio=args.skipAudio,
+        skip_video=args.skipVideo,
+        debug=args.debugProgram,
+        batch=args.batch,
+        encoder_threads=args.encoderThreads,
+    )
 
     try:
-        main(
-            initial_title=initial_title,
-            initial_artist=initial_artist,
-            initial_skip_audio=args.skipAudio,
-            initial_skip_video=args.skipVideo,
-            initial_debug=args.debugProgram,
-        )
+        main(prefill)
     except Exception as exc:  # pragma: no cover - last-resort error dialog
-        messagebox.showerror("Unexpected error", str(exc))
+        _show_error("Unexpected error", str(exc))
         sys.exit(1)
 